@@ -1,21 +1,245 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
+import functools
+import itertools
 import json
+import mmap
+import re
+import shelve
 import sys
-from typing import Iterable, Optional, Sequence, TypedDict
+import threading
+import time
+from typing import Callable, Iterable, Mapping, MutableMapping, Optional, Sequence, TypedDict
 
 import argparse
 import os
 import urllib.parse
+import numpy
 import pandas
 import requests
 import tqdm
+import urllib3
 import github
 from github.Repository import Repository
 from github.Issue import Issue
 from github.Commit import Commit
 
+try:
+    import orjson
+except ImportError:
+    orjson = None # Fall back to the (slower) standard library `json`
+
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None # HTTP caching is unavailable
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None # Saving to Parquet is unavailable
+
 DEFAULT_OUTPUT = "out"
 DEFAULT_INPUT = "in.json"
+DEFAULT_MAX_WORKERS = 8
+MAX_RETRIES = 5
+RETRY_BACKOFF = 2.0 # seconds, doubled on every attempt
+
+API_RETRY = urllib3.util.Retry(
+    total=MAX_RETRIES,
+    backoff_factor=RETRY_BACKOFF,
+    status_forcelist=(500, 502, 503, 504),
+    raise_on_status=False,
+)
+"""
+The `retry` to create `github.Github` clients with: retries server errors only.
+PyGithub's default `GithubRetry` also sleeps on rate limits, resending with the same token,
+which would stack with (and defeat the token rotation of) `retry_on_rate_limit`.
+"""
+
+@functools.lru_cache(maxsize=4096)
+def _owner_name(url: str) -> tuple[str, str]:
+    """
+    Extract the owner and name of the repository referenced by the GitHub `url`.
+    """
+    owner, name = urllib.parse.urlparse(url).path.strip("/").split("/")[-2:]
+    return owner, name
+
+def rate_limit_delay(
+    status: Optional[int],
+    headers: Optional[Mapping[str, str]],
+    attempt: int,
+) -> Optional[float]:
+    """
+    Compute how long to wait before retrying a GitHub API call which responded with `status` and `headers`.
+    Uses the `Retry-After` header if present, otherwise waits until `X-RateLimit-Reset` once `X-RateLimit-Remaining` hits 0,
+    falling back to an exponential backoff based on `attempt`.
+    `return None` if the response was not rate-limited.
+    """
+    headers = {key.lower(): value for key, value in (headers or {}).items()}
+
+    exhausted = headers.get("x-ratelimit-remaining") == "0"
+
+    # A 403 without any rate-limit headers is a plain "forbidden"
+    if status != 429 and not (status == 403 and ("retry-after" in headers or exhausted)):
+        return None
+
+    if "retry-after" in headers:
+        return float(headers["retry-after"])
+    if exhausted and "x-ratelimit-reset" in headers:
+        return max(float(headers["x-ratelimit-reset"]) - time.time(), 0) + 1
+    return RETRY_BACKOFF * 2 ** attempt
+
+def _rate_limit_delay_of(e: Exception, attempt: int) -> Optional[float]:
+    if isinstance(e, github.GithubException):
+        return rate_limit_delay(e.status, e.headers, attempt)
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        return rate_limit_delay(e.response.status_code, e.response.headers, attempt)
+    return None
+
+_pooled_token = threading.local()
+"""
+The `TokenPool` and token of the last PyGithub API call made by the current thread, see `TokenPoolAuth`
+"""
+
+def _report_to_token_pool(e: Exception) -> bool:
+    """
+    Report the rate-limited PyGithub API call which raised `e` to the `TokenPool` its token came from.
+    `return True` if that pool has another token available, so the call can be retried right away.
+    """
+    last = getattr(_pooled_token, "value", None)
+    if last is None or not isinstance(e, github.GithubException):
+        return False
+
+    tokens, token = last
+    tokens.update(token, e.status, e.headers or {})
+    return tokens.available()
+
+def retry_on_rate_limit(func: Callable) -> Callable:
+    """
+    Retry `func` up to `MAX_RETRIES` times when it raises because GitHub rate-limited the API call,
+    sleeping for the duration given by `rate_limit_delay` in between,
+    unless the call was made through `TokenPoolAuth` and the pool has another token available.
+    PyGithub clients should be created with `retry=API_RETRY`, so that rate limits are not also waited for by PyGithub itself.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(MAX_RETRIES):
+            _pooled_token.value = None
+            try:
+                return func(*args, **kwargs)
+            except (github.GithubException, requests.HTTPError) as e:
+                delay = _rate_limit_delay_of(e, attempt)
+                if delay is None:
+                    raise
+                if not _report_to_token_pool(e):
+                    time.sleep(delay)
+        return func(*args, **kwargs)
+    return wrapper
+
+class TokenPool:
+    """
+    Round-robin over several GitHub Personal Access Tokens, to spread the API calls over their rate limits.
+    Tokens whose rate limit is exhausted are skipped until they are reset. Safe to share between threads.
+    """
+
+    def __init__(self, tokens: str | Sequence[str]):
+        self.tokens = [tokens] if isinstance(tokens, str) else list(tokens)
+        if len(self.tokens) == 0:
+            raise ValueError("at least one token is required")
+
+        self._cycle = itertools.cycle(self.tokens)
+        self._available_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def next(self) -> str:
+        """
+        Get the next token whose rate limit is not exhausted.
+        If all of them are exhausted, the one which is reset first is returned.
+        """
+        with self._lock:
+            now = time.time()
+            for _ in range(len(self.tokens)):
+                token = next(self._cycle)
+                if self._available_at.get(token, 0) <= now:
+                    return token
+            return min(self.tokens, key=lambda token: self._available_at[token])
+
+    def available(self) -> bool:
+        """
+        `return True` if any token's rate limit is not exhausted.
+        """
+        with self._lock:
+            now = time.time()
+            return any(self._available_at.get(token, 0) <= now for token in self.tokens)
+
+    def update(self, token: str, status: int, headers: Mapping[str, str]) -> None:
+        """
+        Register the response to an API call made with `token`, marking it exhausted if it was rate-limited.
+        """
+        delay = rate_limit_delay(status, headers, 0)
+        with self._lock:
+            if delay is None:
+                self._available_at.pop(token, None)
+            else:
+                self._available_at[token] = time.time() + max(delay, 1)
+
+class TokenPoolAuth(github.Auth.Token):
+    """
+    PyGithub authentication which takes the token of every API call from a `TokenPool`.
+    The token is remembered per thread, so that `retry_on_rate_limit` can report it as exhausted to the pool
+    when PyGithub raises because of a rate limit, and retry with the next token right away.
+    """
+
+    def __init__(self, tokens: TokenPool):
+        super().__init__(tokens.tokens[0])
+        self.pool = tokens
+
+    @property
+    def token(self) -> str:
+        return self.pool.next()
+
+    def authentication(self, headers: dict) -> None:
+        token = self.pool.next()
+        _pooled_token.value = (self.pool, token)
+        headers["Authorization"] = f"{self.token_type} {token}"
+
+def api_session(
+    max_connections: int = DEFAULT_MAX_WORKERS,
+) -> requests.Session:
+    """
+    Create a `requests.Session` to share between API calls, so that they reuse connections instead of each opening their own.
+    Keeps up to `max_connections` connections open, which should match the number of threads using it.
+    """
+    session = requests.Session()
+    session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=max_connections))
+    return session
+
+@retry_on_rate_limit
+def _request(
+    method: str,
+    url: str,
+    tokens: TokenPool,
+    headers: Mapping[str, str] = {},
+    session: Optional[requests.Session] = None,
+    **kwargs
+) -> requests.Response:
+    """
+    Perform an API call authenticated with a token from `tokens`, using `session` if given,
+    moving on to the next token immediately if the rate limit of the current one is exhausted.
+    """
+    while True:
+        token = tokens.next()
+        response = (session if session is not None else requests).request(
+            method, url, headers={**headers, "Authorization": f"bearer {token}"}, **kwargs
+        )
+        tokens.update(token, response.status_code, response.headers)
+
+        if rate_limit_delay(response.status_code, response.headers, 0) is None:
+            return response
+        if not tokens.available():
+            response.raise_for_status()
 
 IssuesStats = TypedDict(
     "IssueStats",
@@ -38,19 +262,39 @@ IssuesStats = TypedDict(
 The format used to represent issue statistics
 """
 
+START_OF_WORK_EVENT_TYPES: frozenset[str] = frozenset({"connected", "assigned", "committed"})
+"""
+The timeline event types which mark the start-of-work on an issue
+"""
+
+END_OF_WORK_EVENT_TYPES: frozenset[str] = frozenset({"closed", "convert_to_draft", "converted_to_discussion", "deployed", "marked_as_duplicate", "merged"})
+"""
+The timeline event types which mark the end-of-work on an issue
+"""
+
 def issue_stats_from_api(
     repo: Repository,
     issue: Issue,
+    pending_commits: Optional[dict[int, str]] = None,
 ) -> IssuesStats | Exception:
     """
     Extract the statistics of `issue` from `repo` from the GitHub API.
     returns a dictionary whose format is defined by `IssueStats`
+    If `pending_commits` is given, a "committed" start-of-work is not looked up but its commit SHA is stored in `pending_commits` by issue number,
+    so that the caller can resolve them in bulk using `commit_dates_from_api` and `register_committed`.
+    Rate-limited API calls are retried, see `retry_on_rate_limit`. If they are still rate-limited after that, an `Exception` is returned for this issue.
     """
+    try:
+        return _issue_stats_from_api(repo, issue, pending_commits)
+    except (github.GithubException, requests.HTTPError) as e:
+        return Exception(f"error during data extraction of issue #{issue.number} from repository {repo.url}: {e}")
 
-    # Constants
-    START_OF_WORK_EVENT_TYPES = {"connected", "assigned", "committed"}
-    END_OF_WORK_EVENT_TYPES = {"closed", "convert_to_draft", "converted_to_discussion", "deployed", "marked_as_duplicate", "merged"}
-
+@retry_on_rate_limit
+def _issue_stats_from_api(
+    repo: Repository,
+    issue: Issue,
+    pending_commits: Optional[dict[int, str]],
+) -> IssuesStats | Exception:
     # Fields
     number = issue.number
     created_at = issue.created_at
@@ -72,44 +316,45 @@ def issue_stats_from_api(
             if pr.commits > 0:
                 first_commit: Commit = pr.get_commits()[0]
                 if pr.commits == 1 and len(first_commit.parents) == 1:
-                    is_squash == True
+                    is_squash = True
                 else:
                     start_event = "<commit>"
                     started_at = first_commit.commit.author.date
                     start_id = None # "<commit>" has no event-id
         
-        timeline = [event for event in issue.get_timeline()]
+        # Scan the timeline once, keeping only the events of interest.
+        start_of_work = None
+        committed_sha = None
+        last_end_of_work = None
+        last_closed = None
 
-        # Extract start-of-work.
-        start_of_work = next((event for event in timeline if event.event in START_OF_WORK_EVENT_TYPES), None)
+        for event in issue.get_timeline():
+            if start_of_work is None and event.event in START_OF_WORK_EVENT_TYPES:
+                start_of_work = event
+            if event.event == "closed":
+                last_closed = event
+            elif event.event in END_OF_WORK_EVENT_TYPES:
+                last_end_of_work = event
 
+        # Extract start-of-work.
         if start_of_work is None:
             pass
         elif start_of_work.event == "committed":
-            committed_date = repo.get_commit(start_of_work.url.split('/')[-1]).commit.author.date
-
-            # Only register "committed" as start-of-work if it is not preceded by "<commit>"
-            if committed_date <= started_at:
-                start_event = "committed"
-                started_at = committed_date
-                start_id = None # "committed" has no event-id
+            committed_sha = start_of_work.url.split('/')[-1]
         else:
             start_event = start_of_work.event
             started_at = start_of_work.created_at
             start_id = start_of_work.id
 
-        # Extract end-of-work.
-        end_of_work = next((event for event in reversed(timeline) if event.event in END_OF_WORK_EVENT_TYPES - {"closed"}), None)
-
-        if end_of_work is None:
-            end_of_work = next((event for event in reversed(timeline) if event.event in {"closed"}), None)
+        # Extract end-of-work, falling back to the last "closed" event.
+        end_of_work = last_end_of_work if last_end_of_work is not None else last_closed
 
         if end_of_work is not None:
             finish_event = end_of_work.event
             finished_at = end_of_work.created_at
             finish_id = end_of_work.id
 
-        return {
+        stats: IssuesStats = {
             "number": number,
             "created_at": created_at,
             "closed_at": closed_at,
@@ -123,9 +368,106 @@ def issue_stats_from_api(
             "is_pull": is_pull,
             "is_squash": is_squash,
         }
+
+        if committed_sha is None:
+            pass
+        elif pending_commits is not None:
+            pending_commits[number] = committed_sha
+        else:
+            register_committed(stats, repo.get_commit(committed_sha).commit.author.date)
+
+        return stats
     except Exception as e:
+        if _rate_limit_delay_of(e, 0) is not None:
+            raise # Let `retry_on_rate_limit` handle it
         return Exception(f"error during data extraction of issue #{number} from repository {repo.url}: {e}")
 
+def register_committed(
+    stats: IssuesStats,
+    committed_date: datetime,
+) -> IssuesStats:
+    """
+    Register a "committed" event at `committed_date` as the start-of-work of `stats`,
+    but only if it is not preceded by "<commit>".
+    """
+    if stats["started_at"] is None or committed_date <= stats["started_at"]:
+        stats["start_event"] = "committed"
+        stats["started_at"] = committed_date
+        stats["start_id"] = None # "committed" has no event-id
+    return stats
+
+@retry_on_rate_limit
+def _commit_dates_batch(
+    api: github.Github,
+    owner: str,
+    name: str,
+    shas: Sequence[str],
+) -> dict[str, datetime]:
+    variables = {f"c{i}": sha for i, sha in enumerate(shas)}
+    query = "query($owner: String!, $name: String!, %s) { repository(owner: $owner, name: $name) { %s } }" % (
+        ", ".join(f"${alias}: GitObjectID!" for alias in variables),
+        " ".join(f"{alias}: object(oid: ${alias}) {{ ... on Commit {{ authoredDate }} }}" for alias in variables),
+    )
+    _, data = api.requester.graphql_query(query, {"owner": owner, "name": name, **variables})
+
+    # `authoredDate` keeps the author's UTC offset, unlike the REST API
+    repository = data["data"]["repository"]
+    return {
+        sha: datetime.fromisoformat(repository[alias]["authoredDate"]).astimezone(timezone.utc)
+        for alias, sha in variables.items()
+        if repository[alias] is not None
+    }
+
+def commit_dates_from_api(
+    api: github.Github,
+    owner: str,
+    name: str,
+    shas: Iterable[str],
+    batch_size: int = 100,
+) -> dict[str, datetime]:
+    """
+    Look up the author dates of the commits with the given `shas` in the repository `owner`/`name`.
+    Uses a single GraphQL API call per `batch_size` commits, instead of a REST API call per commit.
+    Commits which could not be found are left out.
+    """
+    shas = list(dict.fromkeys(shas))
+    dates = {}
+    for i in range(0, len(shas), batch_size):
+        dates.update(_commit_dates_batch(api, owner, name, shas[i:i + batch_size]))
+    return dates
+
+def enable_http_cache(
+    path: str,
+) -> bool:
+    """
+    Cache the responses of all GitHub REST API calls (including those made by PyGithub) in the SQLite database at `path`.
+    Cached responses are always revalidated using their ETag: unchanged data is answered with `304 Not Modified`,
+    which does not count against the rate limit.
+    `return False` if the optional `requests-cache` package is not installed.
+    """
+    if requests_cache is None:
+        return False
+
+    requests_cache.install_cache(path, backend="sqlite", expire_after=requests_cache.EXPIRE_IMMEDIATELY)
+    return True
+
+ISSUE_CACHE_VERSION = 1
+"""
+The version of the entries of an issue cache (see `repository_stats_from_api`), to be incremented whenever `IssuesStats` changes
+"""
+
+IssueCacheEntry = tuple[int, datetime, IssuesStats]
+"""
+An entry of an issue cache: `(ISSUE_CACHE_VERSION, issue.updated_at, stats)`
+"""
+
+def _issue_cache_key(
+    owner: str,
+    name: str,
+    issue: Issue,
+) -> str:
+    return f"{owner}/{name}#{issue.number}"
+
 RepositoryStats = TypedDict(
     "RepositoryStats",
     {
@@ -137,26 +479,106 @@ RepositoryStats = TypedDict(
 The format used to represent repository statistics
 """
 
+SEARCH_RESULTS_LIMIT = 1000
+"""
+The maximum number of results the GitHub Search API returns for a single query
+"""
+
+def _github_timestamp(date: datetime) -> str:
+    return date.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+@retry_on_rate_limit
+def _search_issues(
+    api: github.Github,
+    query: str,
+    splittable: bool,
+) -> tuple[int, bool, Optional[list[Issue]]]:
+    """
+    Run the issue search `query` once, returning its total count, whether its results are incomplete, and the results themselves.
+    If `splittable` and the total count reaches `SEARCH_RESULTS_LIMIT`, only the first page is fetched and `None` is returned as results.
+    Retried on its own, so that a rate-limited query does not repeat the other queries of `closed_issues_from_api`.
+    """
+    results = api.search_issues(query, sort="created", order="asc")
+
+    # Fetching the first page also provides the total count, which would otherwise cost an extra API call.
+    issues = iter(results)
+    first = next(issues, None)
+    if first is None:
+        return 0, bool(results.incomplete_results), []
+
+    if splittable and results.totalCount >= SEARCH_RESULTS_LIMIT:
+        return results.totalCount, bool(results.incomplete_results), None
+
+    found = [first, *issues]
+    return results.totalCount, bool(results.incomplete_results), found # Updated by every page
 
+def closed_issues_from_api(
+    api: github.Github,
+    owner: str,
+    name: str,
+    created_since: datetime,
+    created_until: datetime,
+    closed_since: datetime,
+) -> list[Issue]:
+    """
+    Search the issues (and pull requests) of the repository `owner`/`name` created between `created_since` and `created_until` and closed since `closed_since`.
+    The filtering is done by the GitHub Search API. As it returns at most `SEARCH_RESULTS_LIMIT` results per query,
+    the creation period is split in halves until every query fits.
+    Searches which time out on GitHub's side and return incomplete results are retried up to `MAX_RETRIES` times.
+    """
+    query = (
+        f"repo:{owner}/{name} is:closed"
+        f" created:{_github_timestamp(created_since)}..{_github_timestamp(created_until)}"
+        f" closed:>={_github_timestamp(closed_since)}"
+    )
+    for attempt in range(MAX_RETRIES + 1):
+        total_count, incomplete, found = _search_issues(api, query, created_until - created_since > timedelta(seconds=1))
+
+        if found is None:
+            middle = created_since + (created_until - created_since) / 2
+            return (
+                closed_issues_from_api(api, owner, name, created_since, middle, closed_since)
+                + closed_issues_from_api(api, owner, name, middle + timedelta(seconds=1), created_until, closed_since)
+            )
+
+        if not incomplete:
+            break
+        if attempt < MAX_RETRIES:
+            time.sleep(RETRY_BACKOFF ** attempt)
+    else:
+        raise RuntimeError(f"the search `{query}` kept returning incomplete results")
+
+    if total_count > SEARCH_RESULTS_LIMIT:
+        print(
+            f"only {SEARCH_RESULTS_LIMIT} of the {total_count} issues of {owner}/{name} created at {_github_timestamp(created_since)} could be searched",
+            file=sys.stderr,
+        )
+
+    return found
 
 def repository_stats_from_api(
     api: github.Github,
     url: str,
     last_created: timedelta = timedelta(days=int(365 * 1.5)), # 1.5 years
     last_closed: timedelta = timedelta(days=365), # 1 year
-    show_progress: bool = True
+    show_progress: bool = True,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    issue_cache: Optional[MutableMapping[str, IssueCacheEntry]] = None,
 ) -> RepositoryStats | Exception:
     """
     Extract the statistics of `issue` from `repo` from the GitHub API.
-    The `api` parameters is used to perform the API calls.
+    The `api` parameters is used to perform the API calls, and should be created with `retry=API_RETRY` (see `retry_on_rate_limit`).
     `last_created` and `last_closed` are used to specify the maximum time passed since the creation and closure of the issue respectively.
+    Issues are extracted concurrently by up to `max_workers` threads, since extraction is bound by the latency of the API calls.
+    If `issue_cache` is given (e.g. a `shelve`), issues which were not updated since they were last extracted into it are not extracted again.
+    It holds one `IssueCacheEntry` per issue, which is replaced whenever the issue is extracted again.
     If `show_progress == True`, a loading bar will be shown. 
     """
     if last_created <= last_closed:
         raise ValueError("`last_created` must be greater than or equal to `last_closed`")
 
     # Get the Repository
-    owner, name = urllib.parse.urlparse(url).path.strip("/").split("/")[-2:]
+    owner, name = _owner_name(url)
     now = datetime.now(timezone.utc)
     created_since = now - last_created
     closed_since = now - last_closed
@@ -166,16 +588,47 @@ def repository_stats_from_api(
             print(f"Extracting statistics from {url}...")
 
         repo = api.get_repo(f"{owner}/{name}")
-        issuestats = []
+        issues = closed_issues_from_api(api, owner, name, created_since, now, closed_since)
+
+        # Reuse the statistics of issues which were not updated since they were cached.
+        cached: dict[int, IssuesStats] = {}
+        if issue_cache is not None:
+            for issue in issues:
+                version, updated_at, stats = issue_cache.get(_issue_cache_key(owner, name, issue), (None, None, None))
+                if version == ISSUE_CACHE_VERSION and updated_at == issue.updated_at:
+                    cached[issue.number] = stats
+
+        outdated = [issue for issue in issues if issue.number not in cached]
+        pending_commits: dict[int, str] = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(lambda issue: issue_stats_from_api(repo, issue, pending_commits), outdated)
+            extracted = list(tqdm.tqdm(results, total=len(outdated), colour="green") if show_progress else results)
 
-        for issue in repo.get_issues(since=created_since, state="closed"):
-            if issue.state != "closed":
+        # Resolve the "committed" start-of-work events in bulk.
+        # If that fails, only the issues waiting for a commit date fail with it.
+        try:
+            committed_dates = commit_dates_from_api(api, owner, name, pending_commits.values())
+        except Exception as e:
+            committed_dates = e
+
+        for i, issue in enumerate(extracted):
+            if isinstance(issue, Exception) or issue["number"] not in pending_commits:
                 continue
-                
-            if issue.created_at < created_since or issue.closed_at < closed_since:
+            if isinstance(committed_dates, Exception):
+                extracted[i] = Exception(f"error during data extraction of issue #{issue['number']} from repository {repo.url}: {committed_dates}")
                 continue
+            committed_date = committed_dates.get(pending_commits[issue["number"]])
+            if committed_date is not None:
+                register_committed(issue, committed_date)
+
+        if issue_cache is not None:
+            for issue, stats in zip(outdated, extracted):
+                if not isinstance(stats, Exception):
+                    issue_cache[_issue_cache_key(owner, name, issue)] = (ISSUE_CACHE_VERSION, issue.updated_at, stats)
 
-            issuestats.append(issue_stats_from_api(repo, issue))
+        extracted_by_number = {issue.number: stats for issue, stats in zip(outdated, extracted)}
+        issuestats = [cached[issue.number] if issue.number in cached else extracted_by_number[issue.number] for issue in issues]
 
         if show_progress:
             print(f"Done with {url}!")
@@ -187,61 +640,433 @@ def repository_stats_from_api(
     except Exception as e:
         return Exception(f"error during data extraction for {url}: {e}")
 
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+# GraphQL timeline item types and the REST event types they correspond to
+GRAPHQL_EVENT_TYPES = {
+    "ConnectedEvent": "connected",
+    "AssignedEvent": "assigned",
+    "PullRequestCommit": "committed",
+    "ClosedEvent": "closed",
+    "ConvertToDraftEvent": "convert_to_draft",
+    "ConvertedToDiscussionEvent": "converted_to_discussion",
+    "DeployedEvent": "deployed",
+    "MarkedAsDuplicateEvent": "marked_as_duplicate",
+    "MergedEvent": "merged",
+}
+
+def _graphql_timeline(
+    alias: str,
+    first_or_last: str,
+    typenames: Sequence[str],
+) -> str:
+    """
+    Build the GraphQL selection of the first or last timeline item of a type in `typenames`, selected under `alias`.
+    """
+    item_types = ", ".join(re.sub(r"(?<!^)(?=[A-Z])", "_", typename).upper() for typename in typenames)
+    fragments = " ".join(
+        f"... on {typename} {{ {'commit { authoredDate }' if typename == 'PullRequestCommit' else 'createdAt'} }}"
+        for typename in typenames
+    )
+    return f"{alias}: timelineItems({first_or_last}: 1, itemTypes: [{item_types}]) {{ nodes {{ __typename {fragments} }} }}"
+
+GRAPHQL_ISSUES_QUERY = """
+query($owner: String!, $name: String!, $since: DateTime!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    issues(first: 100, after: $cursor, states: CLOSED, filterBy: {since: $since}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number createdAt closedAt stateReason
+        %s
+        %s
+        %s
+      }
+    }
+  }
+}
+""" % (
+    _graphql_timeline("start", "first", ["ConnectedEvent", "AssignedEvent"]),
+    _graphql_timeline("finish", "last", ["ConvertedToDiscussionEvent", "MarkedAsDuplicateEvent"]),
+    _graphql_timeline("closed", "last", ["ClosedEvent"]),
+)
+
+GRAPHQL_PULLS_QUERY = """
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: 100, after: $cursor, states: [CLOSED, MERGED], orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number createdAt closedAt updatedAt
+        commits(first: 1) { totalCount nodes { commit { authoredDate parents { totalCount } } } }
+        %s
+        %s
+        %s
+      }
+    }
+  }
+}
+""" % (
+    _graphql_timeline("start", "first", ["ConnectedEvent", "AssignedEvent", "PullRequestCommit"]),
+    _graphql_timeline("finish", "last", ["ConvertToDraftEvent", "DeployedEvent", "MarkedAsDuplicateEvent", "MergedEvent"]),
+    _graphql_timeline("closed", "last", ["ClosedEvent"]),
+)
+
+def _graphql(
+    tokens: TokenPool,
+    query: str,
+    variables: dict,
+    session: Optional[requests.Session] = None,
+) -> dict:
+    response = _request("POST", GRAPHQL_URL, tokens, session=session, json={"query": query, "variables": variables})
+    response.raise_for_status()
+    body = response.json()
+
+    if body.get("errors"):
+        raise Exception("; ".join(error["message"] for error in body["errors"]))
+
+    return body["data"]
+
+def _datetime_or_none(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value is not None else None
+
+def issue_stats_from_graphql(
+    node: dict,
+) -> IssuesStats:
+    """
+    Convert an issue or pull request `node` returned by `GRAPHQL_ISSUES_QUERY` or `GRAPHQL_PULLS_QUERY` to the `IssueStats` format,
+    following the same rules as `issue_stats_from_api`.
+    The GraphQL API does not expose the REST event-ids, so `start_id` and `finish_id` are always `None`.
+    """
+    start_event = None
+    started_at = None
+    is_pull = "commits" in node
+    is_squash = False
+
+    # Extract first commit in this Issue is a Pull Request.
+    if is_pull and node["commits"]["totalCount"] > 0:
+        first_commit = node["commits"]["nodes"][0]["commit"]
+        if node["commits"]["totalCount"] == 1 and first_commit["parents"]["totalCount"] == 1:
+            is_squash = True
+        else:
+            start_event = "<commit>"
+            # `authoredDate` keeps the author's UTC offset, unlike the other timestamps
+            started_at = datetime.fromisoformat(first_commit["authoredDate"]).astimezone(timezone.utc)
+
+    # Extract start-of-work.
+    start_of_work = next(iter(node["start"]["nodes"]), None)
+
+    if start_of_work is None:
+        pass
+    elif start_of_work["__typename"] == "PullRequestCommit":
+        committed_date = datetime.fromisoformat(start_of_work["commit"]["authoredDate"]).astimezone(timezone.utc)
+
+        # Only register "committed" as start-of-work if it is not preceded by "<commit>"
+        if started_at is None or committed_date <= started_at:
+            start_event = "committed"
+            started_at = committed_date
+    else:
+        start_event = GRAPHQL_EVENT_TYPES[start_of_work["__typename"]]
+        started_at = _datetime_or_none(start_of_work["createdAt"])
+
+    # Extract end-of-work.
+    end_of_work = next(iter(node["finish"]["nodes"] or node["closed"]["nodes"]), None)
+
+    return {
+        "number": node["number"],
+        "created_at": _datetime_or_none(node["createdAt"]),
+        "closed_at": _datetime_or_none(node["closedAt"]),
+        "start_event": start_event,
+        "started_at": started_at,
+        "start_id": None,
+        "finish_event": GRAPHQL_EVENT_TYPES[end_of_work["__typename"]] if end_of_work is not None else None,
+        "finished_at": _datetime_or_none(end_of_work["createdAt"]) if end_of_work is not None else None,
+        "finish_id": None,
+        "state_reason": node["stateReason"].lower() if node.get("stateReason") else None,
+        "is_pull": is_pull,
+        "is_squash": is_squash,
+    }
+
+def repository_stats_via_graphql(
+    api_token: str | Sequence[str] | TokenPool,
+    url: str,
+    last_created: timedelta = timedelta(days=int(365 * 1.5)), # 1.5 years
+    last_closed: timedelta = timedelta(days=365), # 1 year
+    show_progress: bool = True,
+    session: Optional[requests.Session] = None,
+) -> RepositoryStats | Exception:
+    """
+    Extract the statistics of the issues and pull requests of the repository referenced by the GitHub `url` from the GitHub GraphQL API.
+    Fetches 100 issues per API call, including the timeline events needed, instead of several REST API calls per issue.
+    `api_token` is the Personnal Access Token used to perform the API calls, several tokens are used in round-robin.
+    `session` (see `api_session`) is used to perform the API calls if given.
+    `last_created` and `last_closed` are used to specify the maximum time passed since the creation and closure of the issue respectively.
+    If `show_progress == True`, a loading bar will be shown. 
+    """
+    if last_created <= last_closed:
+        raise ValueError("`last_created` must be greater than or equal to `last_closed`")
+
+    owner, name = _owner_name(url)
+    now = datetime.now(timezone.utc)
+    created_since = now - last_created
+    closed_since = now - last_closed
+
+    tokens = api_token if isinstance(api_token, TokenPool) else TokenPool(api_token)
+
+    try:
+        nodes = []
+        progress = tqdm.tqdm(desc=f"{owner}/{name}", colour="green", disable=not show_progress)
+
+        # Issues, filtered on their last update by the API.
+        cursor = None
+        while True:
+            variables = {"owner": owner, "name": name, "since": created_since.isoformat(), "cursor": cursor}
+            issues = _graphql(tokens, GRAPHQL_ISSUES_QUERY, variables, session)["repository"]["issues"]
+            nodes.extend(issues["nodes"])
+            progress.update(len(issues["nodes"]))
+
+            if not issues["pageInfo"]["hasNextPage"]:
+                break
+            cursor = issues["pageInfo"]["endCursor"]
+
+        # Pull requests cannot be filtered on their last update, but are ordered by it.
+        cursor = None
+        while True:
+            variables = {"owner": owner, "name": name, "cursor": cursor}
+            pulls = _graphql(tokens, GRAPHQL_PULLS_QUERY, variables, session)["repository"]["pullRequests"]
+            recent = [pull for pull in pulls["nodes"] if datetime.fromisoformat(pull["updatedAt"]) >= created_since]
+            nodes.extend(recent)
+            progress.update(len(recent))
+
+            if len(recent) < len(pulls["nodes"]) or not pulls["pageInfo"]["hasNextPage"]:
+                break
+            cursor = pulls["pageInfo"]["endCursor"]
+
+        progress.close()
+
+        issuestats = [
+            issue_stats_from_graphql(node)
+            for node in nodes
+            if datetime.fromisoformat(node["createdAt"]) >= created_since
+            and datetime.fromisoformat(node["closedAt"]) >= closed_since
+        ]
+
+        return {
+            "url": url,
+            "issues": sorted(issuestats, key=lambda issue: issue["number"], reverse=True)
+        }
+    except Exception as e:
+        return Exception(f"error during data extraction for {url}: {e}")
+
+OUTPUT_FORMATS = ("dir", "ndjson", "parquet")
+"""
+The supported output formats: one JSON file per issue (`"dir"`), one NDJSON file per repository (`"ndjson"`),
+or one Parquet file per repository (`"parquet"`, requires `pyarrow`)
+"""
+
+ISSUE_SCHEMA = pyarrow.schema([
+    ("number", pyarrow.int64()),
+    ("created_at", pyarrow.timestamp("us", "UTC")),
+    ("closed_at", pyarrow.timestamp("us", "UTC")),
+    ("start_event", pyarrow.string()),
+    ("started_at", pyarrow.timestamp("us", "UTC")),
+    ("start_id", pyarrow.int64()),
+    ("finish_event", pyarrow.string()),
+    ("finished_at", pyarrow.timestamp("us", "UTC")),
+    ("finish_id", pyarrow.int64()),
+    ("state_reason", pyarrow.string()),
+    ("is_pull", pyarrow.bool_()),
+    ("is_squash", pyarrow.bool_()),
+]) if pyarrow is not None else None
+"""
+The Parquet schema of `IssueStats`
+"""
+
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        if obj.tzinfo is None:
+            obj = obj.replace(tzinfo=timezone.utc)
+        return obj.isoformat().replace("+00:00", "Z")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z)
+    return json.dumps(obj, default=_json_default).encode()
+
+def _json_loads(data: bytes | str):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _issues_to_save(
+    url: str,
+    issues: Optional[Sequence[IssuesStats | Exception]],
+) -> list[IssuesStats]:
+    """
+    Filter out the issues of the repository at `url` whose extraction failed, reporting them on `sys.stderr`.
+    """
+    saved = []
+    for issue in issues or []:
+        if isinstance(issue, Exception):
+            print(f"not saving an issue of {url}: {issue}", file=sys.stderr)
+        else:
+            saved.append(issue)
+    return saved
+
 def save_to_files(
-    stats: Iterable[RepositoryStats],
-    output: str = DEFAULT_OUTPUT
+    stats: Iterable[RepositoryStats | Exception],
+    output: str = DEFAULT_OUTPUT,
+    format: str = "dir",
 ) -> None:
+    """
+    Save `stats` to the `output` directory, in the structure described in `README.md`.
+    If `format == "ndjson"`, the issues of every repository are streamed to a single `issues.ndjson` file (one issue per line)
+    instead of one file per issue, which avoids creating (and later opening) thousands of small files.
+    If `format == "parquet"`, the issues of every repository are stored column by column in a single `issues.parquet` file,
+    which is much smaller and can be loaded directly into a `pandas.DataFrame` using `load_from_parquet`.
+    Repositories and issues whose extraction failed (i.e. `Exception`s, see `repository_stats_from_api`) are reported on `sys.stderr` and skipped.
+    """
+    if format not in OUTPUT_FORMATS:
+        raise ValueError(f"`format` must be one of {OUTPUT_FORMATS}")
+    if format == "parquet" and pyarrow is None:
+        raise ImportError("the \"parquet\" format requires the `pyarrow` package")
+
     for repo in stats:
-        owner, name = urllib.parse.urlparse(repo["url"]).path.strip("/").split("/")[-2:]
-        issues = repo["issues"]
+        if isinstance(repo, Exception):
+            print(f"not saving a repository: {repo}", file=sys.stderr)
+            continue
+
+        owner, name = _owner_name(repo["url"])
+        issues = _issues_to_save(repo["url"], repo["issues"])
 
         os.makedirs(f"{output}/{owner}/{name}", exist_ok=True)
-        os.makedirs(f"{output}/{owner}/{name}/issues", exist_ok=True)
 
-        if issues is None:
+        if format == "parquet":
+            # Written even without issues, so that `load_from_files` recognizes the format.
+            table = pyarrow.table(
+                {field: [issue[field] for issue in issues] for field in ISSUE_SCHEMA.names},
+                schema=ISSUE_SCHEMA,
+            )
+            pyarrow.parquet.write_table(table, f"{output}/{owner}/{name}/issues.parquet", compression="zstd")
+            continue
+
+        if format == "ndjson":
+            # Written even without issues, so that `load_from_files` recognizes the format.
+            with open(f"{output}/{owner}/{name}/issues.ndjson", "wb", buffering=1 << 20) as issues_ndjson:
+                for issue in issues:
+                    issues_ndjson.write(_json_dumps(issue))
+                    issues_ndjson.write(b"\n")
             continue
 
+        os.makedirs(f"{output}/{owner}/{name}/issues", exist_ok=True)
+
         for issue in issues:
-            with open(f"{output}/{owner}/{name}/issues/{issue["number"]}.json", "w") as issue_json:
-                json.dump(issue, issue_json)
+            with open(f"{output}/{owner}/{name}/issues/{issue['number']}.json", "wb") as issue_json:
+                issue_json.write(_json_dumps(issue))
 
-def load_from_files(
+def _issue_from_json(
+    obj: dict
+) -> IssuesStats:
+    return {
+        "number": obj["number"],
+        "created_at": datetime.fromisoformat(obj["created_at"]),
+        "closed_at": datetime.fromisoformat(obj["closed_at"]),
+        "start_event": obj["start_event"],
+        "started_at": _datetime_or_none(obj["started_at"]),
+        "start_id": obj["start_id"],
+        "finish_event": obj["finish_event"],
+        "finished_at": _datetime_or_none(obj["finished_at"]),
+        "finish_id": obj["finish_id"],
+        "state_reason": obj["state_reason"],
+        "is_pull": obj["is_pull"],
+        "is_squash": obj["is_squash"],
+    }
+
+def _read_files(
+    paths: Sequence[str]
+) -> list[bytes]:
+    contents = []
+    for path in paths:
+        with open(path, "rb") as file:
+            contents.append(file.read())
+    return contents
+
+def _load_ndjson(
+    path: str
+) -> list[IssuesStats]:
+    """
+    Load the issues of an `issues.ndjson` file, parsing it line by line from a memory map rather than reading it into memory first.
+    """
+    if os.path.getsize(path) == 0:
+        return [] # Empty files cannot be mapped
+
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return [_issue_from_json(_json_loads(line)) for line in iter(mapped.readline, b"") if line.strip()]
+
+def load_from_parquet(
     directory: str = DEFAULT_OUTPUT
+) -> pandas.DataFrame:
+    """
+    Load the statistics saved in `directory` by `save_to_files` with `format == "parquet"` directly into a `pandas.DataFrame`,
+    in the same format as `repository_stats_to_df`.
+    """
+    if pyarrow is None:
+        raise ImportError("loading Parquet files requires the `pyarrow` package")
+
+    tables = []
+    for owner_dir in os.scandir(directory):
+        for name_dir in os.scandir(owner_dir.path):
+            if not os.path.exists(f"{name_dir.path}/issues.parquet"):
+                continue # Saved in another format
+
+            table = pyarrow.parquet.read_table(f"{name_dir.path}/issues.parquet", schema=ISSUE_SCHEMA)
+            url = pyarrow.array([f"https://github.com/{owner_dir.name}/{name_dir.name}"] * table.num_rows, pyarrow.string())
+            tables.append(table.add_column(0, "url", url))
+
+    if len(tables) == 0:
+        return pandas.DataFrame(columns=["url", *ISSUE_SCHEMA.names])
+
+    return pyarrow.concat_tables(tables).to_pandas()
+
+def load_from_files(
+    directory: str = DEFAULT_OUTPUT,
+    max_workers: int = 32,
+    chunk_size: int = 256,
 ) -> Sequence[RepositoryStats]:
-    stats = []
+    """
+    Load the statistics saved in `directory` by `save_to_files`, in either of the `OUTPUT_FORMATS`.
+    Files of one issue each are read concurrently by up to `max_workers` threads, in chunks of `chunk_size` files.
+    Parsing happens on the calling thread, as it holds the GIL anyway.
+    """
+    issues: dict[str, list[IssuesStats]] = {}
+    chunks: list[tuple[str, list[str]]] = []
+
     for owner_dir in os.scandir(directory):
-        owner = owner_dir.name
-        name = None
-        issues = []
-
-        for name_dir in os.scandir(f"{directory}/{owner}"):
-            name = name_dir.name
-
-            for issue_file in os.scandir(f"{directory}/{owner}/{name}/issues"):
-                fd = open(issue_file.path)
-
-                obj: IssuesStats = json.load(fd)
-
-                issues.append({
-                    "number": obj["number"],
-                    "created_at": datetime.fromisoformat(obj["created_at"]),
-                    "closed_at": datetime.fromisoformat(obj["closed_at"]),
-                    "start_event": obj["start_event"],
-                    "started_at": datetime.fromisoformat(obj["created_at"]) if "created_at" in obj else None,
-                    "start_id": obj["start_id"],
-                    "finish_event": obj["finish_event"],
-                    "finished_at":  datetime.fromisoformat(obj["finished_at"]) if "finished_at" in obj else None,
-                    "finish_id": obj["finish_id"],
-                    "state_reason": obj["state_reason"],
-                    "is_pull": obj["is_pull"],
-                    "is_squash": obj["is_squash"],
-                })
-
-        stats.append({
-            "url": f"https://github.com/{owner}/{name}",
-            "issues": issues
-        })
-    return stats
+        for name_dir in os.scandir(owner_dir.path):
+            url = f"https://github.com/{owner_dir.name}/{name_dir.name}"
+
+            if os.path.exists(f"{name_dir.path}/issues.parquet"):
+                if pyarrow is None:
+                    raise ImportError("loading Parquet files requires the `pyarrow` package")
+                issues[url] = pyarrow.parquet.read_table(f"{name_dir.path}/issues.parquet", schema=ISSUE_SCHEMA).to_pylist()
+            elif os.path.exists(f"{name_dir.path}/issues.ndjson"):
+                issues[url] = _load_ndjson(f"{name_dir.path}/issues.ndjson")
+            else:
+                issues[url] = []
+                paths = [issue_file.path for issue_file in os.scandir(f"{name_dir.path}/issues")]
+                chunks.extend((url, paths[i:i + chunk_size]) for i in range(0, len(paths), chunk_size))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for (url, _), contents in zip(chunks, executor.map(lambda chunk: _read_files(chunk[1]), chunks)):
+            issues[url].extend(_issue_from_json(_json_loads(content)) for content in contents)
+
+    return [
+        {
+            "url": url,
+            "issues": repo_issues
+        }
+        for url, repo_issues in issues.items()
+    ]
 
 def repository_stats_to_df(
     stats: Sequence[RepositoryStats]
@@ -258,66 +1083,86 @@ def repository_stats_to_df(
 
 def commits_in_last_n_days(
     url: str,
-    api_token: str,
+    api_token: str | Sequence[str] | TokenPool,
     n: int = 90,
+    since: Optional[str] = None,
+    session: Optional[requests.Session] = None,
 ) -> int:
     """
     Extraction the # of commits made in the last `n` days in the repository references by the GitHub `url`.
     `return 0` for Repository which could not be found (because they are, for example, deleted or private).
-    `api_token` is the Personnal Access Token used to perform the API calls.
+    `api_token` is the Personnal Access Token used to perform the API calls, several tokens are used in round-robin.
+    `since` (an ISO 8601 timestamp) overrides `n`, so that it can be computed once for many calls.
+    `session` (see `api_session`) is used to perform the API call if given.
     """
-    owner, name = urllib.parse.urlparse(url).path.strip("/").split("/")[-2:]
+    if since is None:
+        since = _github_timestamp(datetime.now(timezone.utc) - timedelta(days=n))
+
+    tokens = api_token if isinstance(api_token, TokenPool) else TokenPool(api_token)
+    owner, name = _owner_name(url)
 
 
     get_url = f"https://api.github.com/repos/{owner}/{name}/commits"
     
     get_headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-        "Authorization": f"token {api_token}"
+        "Accept": "application/vnd.github+json",
     }
 
     get_parameters = {
-        "since": (datetime.now(timezone.utc) - timedelta(days=n)).isoformat() + "Z",
+        "since": since,
         "per_page": 1
     }
 
-    response = requests.get(url=get_url, params=get_parameters, headers=get_headers)
+    response = _request("GET", get_url, tokens, session=session, params=get_parameters, headers=get_headers)
     
     if response.status_code not in range(200, 299):
         return 0
     
-    ncommits = len(response.json())
+    # With one commit per page, the number of the last page is the number of commits: the body is only needed without one.
     last = response.links.get("last")
 
     if last:
         query = urllib.parse.urlparse(last["url"]).query
-        ncommits = int(dict(urllib.parse.parse_qsl(query))["page"])
+        return int(dict(urllib.parse.parse_qsl(query))["page"])
 
-    return ncommits
+    return len(_json_loads(response.content))
 
 def active_sample(
     urls: Iterable[str],
-    api_token: str,
+    api_token: str | Sequence[str],
     n: int = 40,
-    show_progress: bool = True
+    show_progress: bool = True,
+    max_workers: int = DEFAULT_MAX_WORKERS,
 ) -> pandas.DataFrame:
     """
     Create a selection of `n` most active GitHub repositories below the 90th-percentile in number of commits in the last 90 days,
     within the GitHub repositories in `urls`.
     Discards any repository which has no commits before doing this selection.
-    `api_token` is the Personnal Access Token used to perform the API calls.
+    `api_token` is the Personnal Access Token used to perform the API calls, several tokens are used in round-robin.
+    Up to `max_workers` repositories are queried concurrently.
     If `show_progress == True`, then a loading bar will shown.
     """
+    urls = list(urls)
+    tokens = TokenPool(api_token)
+    since = _github_timestamp(datetime.now(timezone.utc) - timedelta(days=90))
+
+    with api_session(max_workers) as session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda url: commits_in_last_n_days(url, tokens, since=since, session=session), urls)
+        last90 = list(tqdm.tqdm(results, total=len(urls), colour="green") if show_progress else results)
+
     df = pandas.DataFrame({
-        "url": list(urls),
-        "last90": [commits_in_last_n_days(url, api_token) for url in (tqdm.tqdm(urls, colour="green") if show_progress else urls)]
+        "url": urls,
+        "last90": last90
     })
 
-    df = df[df.last90 != 0]
-    df = df[df.last90 < df.last90.quantile(0.9)]
-    df = df[-n:]
-    return df
+    # Select with a single mask, with the 90th-percentile computed over the active repositories only.
+    last90 = df["last90"].to_numpy()
+    active = last90 > 0
+    if not active.any():
+        return df.iloc[:0]
+
+    mask = active & (last90 < numpy.quantile(last90[active], 0.9))
+    return df.iloc[numpy.flatnonzero(mask)[-n:]]
     
 
 
@@ -334,20 +1179,56 @@ if __name__ == "__main__":
         "The structure of the output data is described in the included `README.md`"
     )
     options.add_argument(
-        "-t", "--token", required=True,
-        help="The GitHub Personal Access Token which should be used to collect the data"
+        "-t", "--token", required=True, action="append",
+        help="The GitHub Personal Access Token which should be used to collect the data\n"
+        "Can be given multiple times, in which case the tokens are used in round-robin"
+    )
+    options.add_argument(
+        "-w", "--workers", type=int, default=DEFAULT_MAX_WORKERS,
+        help=f"The number of issues extracted concurrently per repository (default: {DEFAULT_MAX_WORKERS})"
+    )
+
+    options.add_argument(
+        "-f", "--format", choices=OUTPUT_FORMATS, default="dir",
+        help="The format of the output: one JSON file per issue (\"dir\", default), one NDJSON file per repository (\"ndjson\")\n"
+        "or one Parquet file per repository (\"parquet\", requires the `pyarrow` package)"
+    )
+    options.add_argument(
+        "-g", "--graphql", action="store_true",
+        help="Use the GitHub GraphQL API, which needs far fewer API calls but does not provide `start_id` and `finish_id`"
+    )
+
+    options.add_argument(
+        "-c", "--cache",
+        help="The path of a directory in which API responses and extracted issues are cached between runs\n"
+        "Caching API responses requires the `requests-cache` package"
     )
 
     args = options.parse_args()
 
     input = json.load(open(args.input))["values"]
-    api = github.Github(auth=github.Auth.Token(args.token))
+    tokens = TokenPool(args.token)
+    api = github.Github(auth=TokenPoolAuth(tokens), per_page=100, retry=API_RETRY, pool_size=args.workers)
+    session = api_session()
+    issue_cache = None
+
+    if args.cache:
+        os.makedirs(args.cache, exist_ok=True)
+        if not enable_http_cache(f"{args.cache}/http"):
+            print("`requests-cache` is not installed, API responses will not be cached", file=sys.stderr)
+        issue_cache = shelve.open(f"{args.cache}/issues")
 
     stats = [
-        repository_stats_from_api(api, url, show_progress=False)
+        repository_stats_via_graphql(tokens, url, show_progress=False, session=session)
+        if args.graphql else
+        repository_stats_from_api(api, url, show_progress=False, max_workers=args.workers, issue_cache=issue_cache)
         for url
         in tqdm.tqdm(input)
     ]
+
+    session.close()
+    if issue_cache is not None:
+        issue_cache.close()
     
-    save_to_files(stats, args.output)
+    save_to_files(stats, args.output, args.format)
     exit(0)
\ No newline at end of file
@@ -0,0 +1,52 @@
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import data
+
+CREATED_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+COMMITTED_AT = datetime(2024, 1, 2, tzinfo=timezone.utc)
+CLOSED_AT = datetime(2024, 1, 3, tzinfo=timezone.utc)
+
+def stub_pull(
+    parents: int,
+) -> SimpleNamespace:
+    """
+    A stub of a closed pull request `Issue` with a single commit which has `parents` parents, and no timeline events.
+    """
+    commit = SimpleNamespace(
+        parents=[SimpleNamespace()] * parents,
+        commit=SimpleNamespace(author=SimpleNamespace(date=COMMITTED_AT)),
+    )
+    pr = SimpleNamespace(commits=1, get_commits=lambda: [commit])
+    return SimpleNamespace(
+        number=1,
+        created_at=CREATED_AT,
+        closed_at=CLOSED_AT,
+        state_reason=None,
+        pull_request=SimpleNamespace(),
+        as_pull_request=lambda: pr,
+        get_timeline=lambda: [],
+    )
+
+class IssueStatsFromApiTest(unittest.TestCase):
+    repo = SimpleNamespace(url="https://api.github.com/repos/owner/name")
+
+    def test_single_commit_with_single_parent_is_squash(self):
+        stats = data.issue_stats_from_api(self.repo, stub_pull(parents=1))
+
+        self.assertNotIsInstance(stats, Exception)
+        self.assertTrue(stats["is_pull"])
+        self.assertTrue(stats["is_squash"])
+        self.assertIsNone(stats["start_event"])
+
+    def test_merge_commit_is_not_squash(self):
+        stats = data.issue_stats_from_api(self.repo, stub_pull(parents=2))
+
+        self.assertNotIsInstance(stats, Exception)
+        self.assertFalse(stats["is_squash"])
+        self.assertEqual(stats["start_event"], "<commit>")
+        self.assertEqual(stats["started_at"], COMMITTED_AT)
+
+if __name__ == "__main__":
+    unittest.main()